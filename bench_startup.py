@@ -0,0 +1,51 @@
+"""
+Cold worker boot ও first-request latency মাপার স্ক্রিপ্ট।
+
+প্রতিটি রান আলাদা নতুন Python প্রসেসে হয়, তাই import cache ছাড়াই মাপা হয়।
+
+    python bench_startup.py              # .env এর MONGO_URI দিয়ে
+    MONGO_URI=mongodb://127.0.0.1:1 MONGO_TIMEOUT_MS=300 python bench_startup.py --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CHILD = r"""
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+t0 = time.perf_counter()
+import bot
+ti = time.perf_counter()
+app = bot.create_app()
+t1 = time.perf_counter()
+client = app.test_client()
+r1 = client.get('/healthz')
+t2 = time.perf_counter()
+r2 = client.get('/readyz')
+t3 = time.perf_counter()
+print(json.dumps({
+    'boot_s': t1 - t0, 'import_s': ti - t0, 'factory_ms': (t1 - ti) * 1000,
+    'healthz_ms': (t2 - t1) * 1000, 'healthz_status': r1.status_code,
+    'readyz_ms': (t3 - t2) * 1000, 'readyz_status': r2.status_code,
+}))
+"""
+
+def run_once(repo_dir):
+    out = subprocess.run([sys.executable, "-c", CHILD, repo_dir], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold worker boot and first-request latency.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    for i in range(args.runs):
+        r = run_once(repo_dir)
+        print(f"run {i + 1}: boot {r['boot_s']:.3f}s (import {r['import_s']:.3f}s + create_app {r['factory_ms']:.1f}ms) | first /healthz {r['healthz_ms']:.1f}ms ({r['healthz_status']}) "
+              f"| first /readyz {r['readyz_ms']:.0f}ms ({r['readyz_status']})")
+
+if __name__ == "__main__":
+    main()
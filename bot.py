@@ -1,6 +1,7 @@
 import os
 import sys
 import re
+import hashlib
 import requests
 import json
 import uuid
@@ -8,8 +9,13 @@ import math
 import threading
 import time
 import urllib.parse
-from flask import Flask, render_template_string, request, redirect, url_for, Response, jsonify
+import http.cookiejar
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import Flask, Blueprint, render_template_string, request, redirect, url_for, Response, jsonify
+import pymongo
 from pymongo import MongoClient
+from requests.adapters import HTTPAdapter
 from bson.objectid import ObjectId
 from dotenv import load_dotenv
 from datetime import datetime
@@ -17,8 +23,8 @@ from datetime import datetime
 # --- কনফিগারেশন লোড ---
 load_dotenv()
 
-app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# সব রুট এই ব্লুপ্রিন্টে, অ্যাপ তৈরি হয় create_app() এ
+bp = Blueprint('main', __name__)
 
 # --- ভেরিয়েবলসমূহ (আপনার .env ফাইল থেকে আসবে) ---
 MONGO_URI = os.getenv("MONGO_URI")
@@ -28,7 +34,9 @@ BOT_USERNAME = os.getenv("BOT_USERNAME")
 PUBLIC_CHANNEL_ID = os.getenv("PUBLIC_CHANNEL_ID")
 SOURCE_CHANNEL_ID = os.getenv("SOURCE_CHANNEL_ID")
 WEBSITE_URL = os.getenv("WEBSITE_URL")
-TELEGRAM_API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
+# লোকাল টেস্টিং-এর জন্য Telegram API সার্ভার বদলানো যায়
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip('/')
+TELEGRAM_API_URL = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}"
 
 # রিকোয়েস্ট চ্যানেলের লিংক (এখানে আপনার লিংক দিন)
 REQUEST_CHANNEL = "https://t.me/YOUR_REQUEST_CHANNEL" 
@@ -37,21 +45,109 @@ REQUEST_CHANNEL = "https://t.me/YOUR_REQUEST_CHANNEL"
 ADMIN_USER = os.getenv("ADMIN_USERNAME", "admin")
 ADMIN_PASS = os.getenv("ADMIN_PASSWORD", "admin")
 
+# সব ওয়ার্কারে একই secret key দরকার, যাতে সেশন যেকোনো ওয়ার্কারে ভ্যালিড থাকে
+SECRET_KEY = os.getenv("SECRET_KEY")
+if not SECRET_KEY:
+    print("⚠️ SECRET_KEY is not set! Using a random per-process key; sessions won't be shared between workers.")
+
 # অটো ডিলিট ও নোটিফিকেশন সেটিংস
 DELETE_TIMEOUT = 600 
 NOTIFICATION_COOLDOWN = 1800 
 
-# --- ডেটাবেস কানেকশন ---
-try:
-    client = MongoClient(MONGO_URI)
-    db = client["moviezone_db"]
-    movies = db["movies"]
-    settings = db["settings"]
-    categories = db["categories"] 
-    print("✅ MongoDB Connected Successfully!")
-except Exception as e:
-    print(f"❌ MongoDB Connection Error: {e}")
-    sys.exit(1)
+# সিজন ব্যাচ ডেলিভারি (sendMediaGroup সর্বোচ্চ ১০টি ফাইল নেয়)
+MEDIA_GROUP_SIZE = 10
+MEDIA_GROUP_DELAY = 1.5
+# Telegram API কলের সর্বোচ্চ সময় (সেকেন্ড)
+TELEGRAM_TIMEOUT = int(os.getenv("TELEGRAM_TIMEOUT", 10))
+
+# কানেকশন পুল সেটিংস (প্রতি ওয়ার্কার প্রসেস)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 20))
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", 5000))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+
+# Long polling (getUpdates) সেটিংস
+POLL_TIMEOUT = int(os.getenv("POLL_TIMEOUT", 50))
+POLL_LIMIT = 100
+POLL_MAX_RETRIES = 5
+POLL_MESSAGE_WORKERS = int(os.getenv("POLL_MESSAGE_WORKERS", 8))
+
+# শর্টলিংক ক্যাশ ও সার্কিট ব্রেকার সেটিংস
+SHORTENER_CACHE_TTL = int(os.getenv("SHORTENER_CACHE_TTL", 30 * 24 * 3600))
+SHORTENER_CACHE_SIZE = int(os.getenv("SHORTENER_CACHE_SIZE", 5000))
+SHORTENER_TIMEOUT = (3, float(os.getenv("SHORTENER_TIMEOUT", 5)))
+SHORTENER_FAIL_THRESHOLD = 5
+SHORTENER_COOLDOWN = 60
+SHORTENER_BREAKER_SIZE = 1000
+SHORTENER_BATCH_LIMIT = 50
+# short_links কালেকশনের প্রতিটি অপারেশনের সর্বোচ্চ সময় (সেকেন্ড)
+SHORTENER_DB_TIMEOUT = float(os.getenv("SHORTENER_DB_TIMEOUT", 0.5))
+# short_links কালেকশনের সর্বোচ্চ এন্ট্রি সংখ্যা
+SHORTENER_DB_MAX_DOCS = int(os.getenv("SHORTENER_DB_MAX_DOCS", 100000))
+SHORTENER_DB_TRIM_EVERY = 100
+SHORTENER_DB_TRIM_TIMEOUT = 10
+# লিডারের সবচেয়ে খারাপ সময়: ৩টি Mongo অপারেশন + আপস্ট্রিম কল
+SHORTENER_LEADER_MAX_WAIT = 3 * SHORTENER_DB_TIMEOUT + sum(SHORTENER_TIMEOUT) + 1
+
+# --- ডেটাবেস ও HTTP কানেকশন (Lazy, প্রতি প্রসেসে আলাদা) ---
+# gunicorn fork করার পর প্যারেন্টের client ব্যবহার করা নিরাপদ নয়,
+# তাই প্রতিটি প্রসেস প্রথম ব্যবহারের সময় নিজের client তৈরি করে।
+_clients = {"pid": None, "mongo": None, "http": None}
+_clients_lock = threading.Lock()
+
+def _reset_clients():
+    _clients.update(pid=None, mongo=None, http=None)
+
+def _after_fork_in_child():
+    global _clients_lock
+    _clients_lock = threading.Lock()
+    _reset_clients()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def _ensure_process_clients():
+    if _clients["pid"] != os.getpid():
+        _reset_clients()
+        _clients["pid"] = os.getpid()
+
+def get_db():
+    with _clients_lock:
+        _ensure_process_clients()
+        if _clients["mongo"] is None:
+            _clients["mongo"] = MongoClient(
+                MONGO_URI,
+                connect=False,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+            )
+        return _clients["mongo"]["moviezone_db"]
+
+def get_http():
+    with _clients_lock:
+        _ensure_process_clients()
+        if _clients["http"] is None:
+            session = requests.Session()
+            # শুধু কানেকশন পুলিং, কুকি রাখা হয় না (যাতে এক কলারের কুকি অন্যের কলে না যায়)
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _clients["http"] = session
+        return _clients["http"]
+
+class LazyCollection:
+    """প্রথম ব্যবহারের সময় বর্তমান প্রসেসের ডেটাবেস থেকে কালেকশন রিজলভ করে।"""
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self._name], attr)
+
+movies = LazyCollection("movies")
+settings = LazyCollection("settings")
+categories = LazyCollection("categories")
+short_links = LazyCollection("short_links")
+bot_state = LazyCollection("bot_state")
 
 # === Helper Functions ===
 
@@ -99,9 +195,117 @@ def extract_youtube_id(url):
 
 def delete_message_later(chat_id, message_id, delay):
     time.sleep(delay)
-    try: requests.post(f"{TELEGRAM_API_URL}/deleteMessage", json={"chat_id": chat_id, "message_id": message_id})
+    try: get_http().post(f"{TELEGRAM_API_URL}/deleteMessage", json={"chat_id": chat_id, "message_id": message_id}, timeout=TELEGRAM_TIMEOUT)
     except: pass
 
+def delete_messages_later(chat_id, message_ids, delay):
+    # পুরো গ্রুপের জন্য একটাই ক্লিনআপ, deleteMessages একবারে ১০০টি পর্যন্ত মেসেজ নেয়
+    time.sleep(delay)
+    for i in range(0, len(message_ids), 100):
+        try: get_http().post(f"{TELEGRAM_API_URL}/deleteMessages", json={"chat_id": chat_id, "message_ids": message_ids[i:i+100]}, timeout=TELEGRAM_TIMEOUT)
+        except: pass
+
+def get_season_label(episode_label):
+    match = re.match(r'S\d+', episode_label or '')
+    return match.group(0) if match else ""
+
+def get_episode_number(file):
+    # "S01 E100" স্ট্রিং হিসেবে "S01 E11"-এর আগে আসে, তাই সংখ্যা দিয়ে সাজানো
+    match = re.search(r'E(\d+)', file.get('episode_label') or '')
+    return int(match.group(1)) if match else float('inf')
+
+def get_batch_code(movie_id, season, quality):
+    # কোড ফাইল লিস্ট থেকেই হিসাব হয়, তাই ডেটাবেসে রাখার বা পেজ রেন্ডারে লেখার দরকার নেই
+    group_hash = hashlib.sha1(f"{season}|{quality}".encode()).hexdigest()[:8]
+    return f"b_{movie_id}_{group_hash}"
+
+def get_batches(movie):
+    # প্রতিটি (সিজন, কোয়ালিটি) গ্রুপে একাধিক ফাইল থাকলে একটি ব্যাচ
+    if not movie or movie.get('type') != 'series': return []
+    counts = OrderedDict()
+    for f in movie.get('files') or []:
+        group = (get_season_label(f.get('episode_label')), f.get('quality'))
+        counts[group] = counts.get(group, 0) + 1
+    return [
+        {"code": get_batch_code(movie['_id'], season, quality), "season": season, "quality": quality}
+        for (season, quality), count in counts.items() if count > 1
+    ]
+
+def send_media_group(chat_id, media):
+    # 429 (Too Many Requests) এলে retry_after অনুযায়ী অপেক্ষা করে আবার চেষ্টা
+    for _ in range(3):
+        resp = get_http().post(f"{TELEGRAM_API_URL}/sendMediaGroup", json={'chat_id': chat_id, 'media': media}, timeout=TELEGRAM_TIMEOUT).json()
+        if resp.get('ok'): return [m['message_id'] for m in resp['result']]
+        retry_after = resp.get('parameters', {}).get('retry_after')
+        if not retry_after: break
+        time.sleep(retry_after)
+    return []
+
+def send_single_file(chat_id, target_file, caption):
+    payload = {'chat_id': chat_id}
+    if caption: payload.update(caption=caption, parse_mode='Markdown')
+    method = 'sendVideo' if target_file['file_type'] == 'video' else 'sendDocument'
+
+    if target_file['file_type'] == 'video': payload['video'] = target_file['file_id']
+    else: payload['document'] = target_file['file_id']
+
+    resp = get_http().post(f"{TELEGRAM_API_URL}/{method}", json=payload, timeout=TELEGRAM_TIMEOUT).json()
+    return [resp['result']['message_id']] if resp.get('ok') else []
+
+def split_media_chunks(files):
+    # sendMediaGroup-এ ২-১০টি আইটেম লাগে, তাই চাঙ্কগুলো সমান ভাগে ভাগ করা হয় যাতে
+    # কোনো চাঙ্কে ১টি ফাইল না থাকে (মোট ১টি হলে সেটা আলাদাভাবে পাঠানো হয়)
+    count = math.ceil(len(files) / MEDIA_GROUP_SIZE)
+    size, extra = divmod(len(files), count) if count else (0, 0)
+    chunks, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(files[start:end])
+        start = end
+    return chunks
+
+def send_batch(chat_id, movie, batch):
+    files = [f for f in movie.get('files') or []
+             if f.get('quality') == batch['quality'] and get_season_label(f.get('episode_label')) == batch['season']]
+    files.sort(key=get_episode_number)
+    if not files: return False
+
+    caption = f"🎬 *{movie['title']}*\n📌 {batch['season'] or 'Season'} • {batch['quality']} ({len(files)} files)\n⚠️ *Links expire in 10 mins!*"
+    # ভিডিও আর ডকুমেন্ট একই মিডিয়া গ্রুপে মেশানো যায় না
+    chunks = []
+    for file_type in ('video', 'document'):
+        chunks += split_media_chunks([f for f in files if f['file_type'] == file_type])
+
+    message_ids = []
+    failed = 0
+    for i, chunk in enumerate(chunks):
+        if i: time.sleep(MEDIA_GROUP_DELAY)
+        chunk_caption = caption if i == 0 else None
+        sent = []
+        try:
+            if len(chunk) == 1:
+                sent = send_single_file(chat_id, chunk[0], chunk_caption)
+            else:
+                media = [{'type': f['file_type'], 'media': f['file_id']} for f in chunk]
+                if chunk_caption: media[0].update(caption=chunk_caption, parse_mode='Markdown')
+                sent = send_media_group(chat_id, media)
+        except: pass
+        if not sent: failed += len(chunk)
+        message_ids += sent
+
+    if message_ids and failed:
+        try: get_http().post(f"{TELEGRAM_API_URL}/sendMessage", json={'chat_id': chat_id, 'text': f"⚠️ {failed} of {len(files)} files could not be sent. Please try again later."}, timeout=TELEGRAM_TIMEOUT)
+        except: pass
+    if message_ids:
+        threading.Thread(target=delete_messages_later, args=(chat_id, message_ids, DELETE_TIMEOUT)).start()
+    return bool(message_ids)
+
+def deliver_batch(chat_id, movie, batch):
+    try:
+        if batch and send_batch(chat_id, movie, batch): return
+        get_http().post(f"{TELEGRAM_API_URL}/sendMessage", json={'chat_id': chat_id, 'text': "❌ File expired."}, timeout=TELEGRAM_TIMEOUT)
+    except Exception as e: print(f"❌ Batch delivery error: {e}")
+
 def check_auth():
     auth = request.authorization
     if not auth or not (auth.username == ADMIN_USER and auth.password == ADMIN_PASS):
@@ -117,12 +321,12 @@ def get_tmdb_details(title, content_type="movie", year=None):
         search_url = f"https://api.themoviedb.org/3/search/{tmdb_type}?api_key={TMDB_API_KEY}&query={query_str}"
         if year and tmdb_type == "movie": search_url += f"&year={year}"
 
-        data = requests.get(search_url, timeout=5).json()
+        data = get_http().get(search_url, timeout=5).json()
         if data.get("results"):
             res = data["results"][0]
             m_id = res.get("id")
             details_url = f"https://api.themoviedb.org/3/{tmdb_type}/{m_id}?api_key={TMDB_API_KEY}&append_to_response=credits,videos"
-            extra = requests.get(details_url, timeout=5).json()
+            extra = get_http().get(details_url, timeout=5).json()
 
             trailer_key = None
             if extra.get('videos', {}).get('results'):
@@ -149,138 +353,277 @@ def get_tmdb_details(title, content_type="movie", year=None):
     except: pass
     return {"title": title}
 
-@app.context_processor
+@bp.app_context_processor
 def inject_globals():
     return dict(ad_settings=settings.find_one() or {}, BOT_USERNAME=BOT_USERNAME, site_name="AnimeNexus", request_channel=REQUEST_CHANNEL)
 
-# === TELEGRAM WEBHOOK (Auto Upload) ===
-@app.route(f'/webhook/{BOT_TOKEN}', methods=['POST'])
-def telegram_webhook():
-    update = request.get_json()
-    if not update: return jsonify({'status': 'ignored'})
-
-    if 'channel_post' in update:
-        msg = update['channel_post']
-        chat_id = str(msg.get('chat', {}).get('id'))
-        
-        if SOURCE_CHANNEL_ID and chat_id != str(SOURCE_CHANNEL_ID): return jsonify({'status': 'wrong_channel'})
-
-        file_id = None
-        file_name = "Unknown"
+# === TELEGRAM UPDATE HANDLERS (webhook ও polling দুই মোডেই ব্যবহৃত) ===
+
+def parse_channel_post(msg):
+    chat_id = str(msg.get('chat', {}).get('id'))
+    if SOURCE_CHANNEL_ID and chat_id != str(SOURCE_CHANNEL_ID): return {'status': 'wrong_channel'}
+
+    file_id = None
+    file_name = "Unknown"
+    file_type = "document"
+
+    if 'video' in msg:
+        video = msg['video']
+        file_id = video['file_id']
+        file_name = video.get('file_name', msg.get('caption', 'Unknown Video'))
+        file_type = "video"
+    elif 'document' in msg:
+        doc = msg['document']
+        file_id = doc['file_id']
+        file_name = doc.get('file_name', 'Unknown Document')
         file_type = "document"
 
-        if 'video' in msg:
-            video = msg['video']
-            file_id = video['file_id']
-            file_name = video.get('file_name', msg.get('caption', 'Unknown Video'))
-            file_type = "video"
-        elif 'document' in msg:
-            doc = msg['document']
-            file_id = doc['file_id']
-            file_name = doc.get('file_name', 'Unknown Document')
-            file_type = "document"
-
-        if not file_id: return jsonify({'status': 'no_file'})
-
-        raw_caption = msg.get('caption')
-        raw_input = raw_caption if raw_caption else file_name
-        search_title = clean_filename(raw_input) 
-        
-        content_type = "movie"
-        if re.search(r'(S\d+|Season|Episode|Ep\s*\d+)', file_name, re.IGNORECASE) or re.search(r'(S\d+|Season)', str(raw_caption), re.IGNORECASE):
-            content_type = "series"
+    if not file_id: return {'status': 'no_file'}
 
-        # প্রাথমিক ডাটা (পরে এডমিন প্যানেল থেকে এডিট করা যাবে)
-        tmdb_data = get_tmdb_details(search_title, content_type)
-        final_title = tmdb_data.get('title', search_title)
-        
-        unique_code = str(uuid.uuid4())[:8]
-        current_time = datetime.utcnow()
+    raw_caption = msg.get('caption')
+    raw_input = raw_caption if raw_caption else file_name
+
+    content_type = "movie"
+    if re.search(r'(S\d+|Season|Episode|Ep\s*\d+)', file_name, re.IGNORECASE) or re.search(r'(S\d+|Season)', str(raw_caption), re.IGNORECASE):
+        content_type = "series"
 
-        file_obj = {
+    return {
+        'status': 'parsed',
+        'chat_id': chat_id,
+        'message_id': msg['message_id'],
+        'raw_input': raw_input,
+        'search_title': clean_filename(raw_input),
+        'content_type': content_type,
+        'file_obj': {
             "file_id": file_id,
-            "unique_code": unique_code,
+            "unique_code": str(uuid.uuid4())[:8],
             "filename": file_name,
             "quality": get_file_quality(file_name),
             "episode_label": get_episode_label(file_name),
             "size": f"{(msg.get('document', {}).get('file_size', 0) / (1024*1024)):.2f} MB",
             "file_type": file_type,
-            "added_at": current_time
-        }
-
-        existing_movie = movies.find_one({"title": final_title})
-        movie_id = None
+        },
+    }
 
-        if existing_movie:
-            movies.update_one({"_id": existing_movie['_id']}, {"$push": {"files": file_obj}, "$set": {"updated_at": current_time}})
-            movie_id = existing_movie['_id']
-        else:
-            new_movie = {
-                "title": final_title,
-                "overview": tmdb_data.get('overview'),
-                "poster": tmdb_data.get('poster'),
-                "backdrop": tmdb_data.get('backdrop'),
-                "release_date": tmdb_data.get('release_date'),
-                "vote_average": tmdb_data.get('vote_average'),
-                "genres": tmdb_data.get('genres'),
-                "trailer": tmdb_data.get('trailer'),
-                "language": detect_language(raw_input),
-                "type": content_type,
-                "category": "Uncategorized",
-                "is_adult": tmdb_data.get('adult', False),
-                "files": [file_obj],
-                "created_at": current_time,
-                "updated_at": current_time
-            }
-            res = movies.insert_one(new_movie)
-            movie_id = res.inserted_id
+def store_channel_posts(posts):
+    # একই টাইটেলের সব পোস্টের জন্য একবার TMDB কল ও একবার Mongo রাইট
+    first = posts[0]
+    # প্রাথমিক ডাটা (পরে এডমিন প্যানেল থেকে এডিট করা যাবে)
+    tmdb_data = get_tmdb_details(first['search_title'], first['content_type'])
+    final_title = tmdb_data.get('title', first['search_title'])
+    current_time = datetime.utcnow()
+
+    # একই ব্যাচে একই ফাইল দুবার এলে (যেমন দুবার ফরোয়ার্ড) একবারই রাখা হয়
+    file_objs = []
+    for p in posts:
+        if any(f['file_id'] == p['file_obj']['file_id'] for f in file_objs): continue
+        file_objs.append(dict(p['file_obj'], added_at=current_time))
+    existing_movie = movies.find_one({"title": final_title})
+    movie_id = None
+
+    if existing_movie:
+        movie_id = existing_movie['_id']
+        # একই আপডেট আবার এলে (রিস্টার্ট/রিট্রাই) একই ফাইল দ্বিতীয়বার যোগ হবে না
+        stored_ids = {f.get('file_id') for f in existing_movie.get('files', [])}
+        file_objs = [f for f in file_objs if f['file_id'] not in stored_ids]
+        new_ids = [f['file_id'] for f in file_objs]
+        if file_objs:
+            res = movies.update_one({"_id": movie_id, "files.file_id": {"$nin": new_ids}}, {"$push": {"files": {"$each": file_objs}}, "$set": {"updated_at": current_time}})
+            if not res.matched_count:
+                # এর মধ্যে অন্য কোথাও কিছু ফাইল যোগ হয়েছে, তাই ফাইল ধরে ধরে যোগ
+                for f in file_objs:
+                    movies.update_one({"_id": movie_id, "files.file_id": {"$ne": f['file_id']}}, {"$push": {"files": f}, "$set": {"updated_at": current_time}})
+    else:
+        new_movie = {
+            "title": final_title,
+            "overview": tmdb_data.get('overview'),
+            "poster": tmdb_data.get('poster'),
+            "backdrop": tmdb_data.get('backdrop'),
+            "release_date": tmdb_data.get('release_date'),
+            "vote_average": tmdb_data.get('vote_average'),
+            "genres": tmdb_data.get('genres'),
+            "trailer": tmdb_data.get('trailer'),
+            "language": detect_language(first['raw_input']),
+            "type": first['content_type'],
+            "category": "Uncategorized",
+            "is_adult": tmdb_data.get('adult', False),
+            "files": file_objs,
+            "created_at": current_time,
+            "updated_at": current_time
+        }
+        res = movies.insert_one(new_movie)
+        movie_id = res.inserted_id
 
-        # Update Telegram Post with Link
-        if movie_id and WEBSITE_URL:
-            direct_link = f"{WEBSITE_URL.rstrip('/')}/movie/{str(movie_id)}"
+    # Update Telegram Post with Link
+    if movie_id and WEBSITE_URL:
+        direct_link = f"{WEBSITE_URL.rstrip('/')}/movie/{str(movie_id)}"
+        for p in posts:
             try:
-                requests.post(f"{TELEGRAM_API_URL}/editMessageReplyMarkup", json={
-                    'chat_id': chat_id,
-                    'message_id': msg['message_id'],
+                get_http().post(f"{TELEGRAM_API_URL}/editMessageReplyMarkup", json={
+                    'chat_id': p['chat_id'],
+                    'message_id': p['message_id'],
                     'reply_markup': json.dumps({"inline_keyboard": [[{"text": "▶️ Check on Website", "url": direct_link}]]})
-                })
+                }, timeout=TELEGRAM_TIMEOUT)
             except: pass
 
+def handle_bot_message(msg):
+    # Bot Reply Logic
+    chat_id = msg.get('chat', {}).get('id')
+    text = msg.get('text', '')
+    if not text.startswith('/start'): return
+
+    parts = text.split()
+    if len(parts) == 1:
+        get_http().post(f"{TELEGRAM_API_URL}/sendMessage", json={'chat_id': chat_id, 'text': "👋 Welcome to Anime Nexus!"}, timeout=TELEGRAM_TIMEOUT)
+        return
+
+    code = parts[1]
+    if code.startswith('b_'):
+        movie_id = code.split('_')[1] if code.count('_') == 2 else ''
+        movie = movies.find_one({"_id": ObjectId(movie_id)}) if ObjectId.is_valid(movie_id) else None
+        batch = next((b for b in get_batches(movie) if b['code'] == code), None)
+        # ডেলিভারিতে চাঙ্কের মাঝে বিরতি ও 429 retry আছে, তাই webhook/polling আটকে না রেখে আলাদা থ্রেডে
+        threading.Thread(target=deliver_batch, args=(chat_id, movie, batch)).start()
+        return
+
+    movie = movies.find_one({"files.unique_code": code})
+    if not movie: return
+    target_file = next((f for f in movie['files'] if f['unique_code'] == code), None)
+    if target_file:
+        caption = f"🎬 *{movie['title']}*\n📌 {target_file['episode_label']}\n⚠️ *Link expires in 10 mins!*"
+        try:
+            sent = send_single_file(chat_id, target_file, caption)
+            if sent:
+                threading.Thread(target=delete_message_later, args=(chat_id, sent[0], DELETE_TIMEOUT)).start()
+        except: pass
+    else:
+        get_http().post(f"{TELEGRAM_API_URL}/sendMessage", json={'chat_id': chat_id, 'text': "❌ File expired."}, timeout=TELEGRAM_TIMEOUT)
+
+def process_updates(updates, pool=None):
+    # চ্যানেল পোস্টগুলো টাইটেল অনুযায়ী গ্রুপ করে একসাথে সেভ হয়।
+    # রিটার্ন করে পরের অফসেট: কোনো গ্রুপ ফেল করলে তার প্রথম update_id, যাতে সেখান থেকে আবার আসে।
+    groups = OrderedDict()
+    messages = []
+    for update in updates:
+        if 'channel_post' in update:
+            parsed = parse_channel_post(update['channel_post'])
+            if parsed['status'] != 'parsed': continue
+            parsed['update_id'] = update['update_id']
+            groups.setdefault((parsed['search_title'].lower(), parsed['content_type']), []).append(parsed)
+        elif 'message' in update:
+            messages.append(update)
+
+    next_offset = updates[-1]['update_id'] + 1
+    for posts in groups.values():
+        try: store_channel_posts(posts)
+        except Exception as e:
+            print(f"❌ Channel post error: {e}")
+            next_offset = min(next_offset, posts[0]['update_id'])
+
+    # ফেল করা পোস্টের পরের মেসেজগুলো রিট্রাইয়ের সময় আসবে, তাই এখন নয়।
+    # pool থাকলে মেসেজগুলো একসাথে ওয়ার্কার থ্রেডে চলে; অফসেট সেভের আগে সবগুলো শেষ হওয়া পর্যন্ত অপেক্ষা।
+    pending = {}
+    failed = []
+    for update in messages:
+        if update['update_id'] >= next_offset: continue
+        if pool:
+            pending[pool.submit(handle_bot_message, update['message'])] = update['update_id']
+            continue
+        try: handle_bot_message(update['message'])
+        except Exception as e:
+            print(f"❌ Message handling error: {e}")
+            failed.append(update['update_id'])
+
+    wait(pending)
+    for future, update_id in pending.items():
+        if future.exception():
+            print(f"❌ Message handling error: {future.exception()}")
+            failed.append(update_id)
+    if failed: next_offset = min(next_offset, min(failed))
+    return next_offset
+
+# === TELEGRAM WEBHOOK (Auto Upload) ===
+@bp.route(f'/webhook/{BOT_TOKEN}', methods=['POST'])
+def telegram_webhook():
+    update = request.get_json()
+    if not update: return jsonify({'status': 'ignored'})
+
+    if 'channel_post' in update:
+        parsed = parse_channel_post(update['channel_post'])
+        if parsed['status'] != 'parsed': return jsonify({'status': parsed['status']})
+        store_channel_posts([parsed])
         return jsonify({'status': 'success'})
 
-    # Bot Reply Logic
     elif 'message' in update:
-        msg = update['message']
-        chat_id = msg.get('chat', {}).get('id')
-        text = msg.get('text', '')
-
-        if text.startswith('/start'):
-            parts = text.split()
-            if len(parts) > 1:
-                code = parts[1]
-                movie = movies.find_one({"files.unique_code": code})
-                if movie:
-                    target_file = next((f for f in movie['files'] if f['unique_code'] == code), None)
-                    if target_file:
-                        caption = f"🎬 *{final_title if 'final_title' in locals() else movie['title']}*\n📌 {target_file['episode_label']}\n⚠️ *Link expires in 10 mins!*"
-                        payload = {'chat_id': chat_id, 'caption': caption, 'parse_mode': 'Markdown'}
-                        method = 'sendVideo' if target_file['file_type'] == 'video' else 'sendDocument'
-                        
-                        if target_file['file_type'] == 'video': payload['video'] = target_file['file_id']
-                        else: payload['document'] = target_file['file_id']
-                        
-                        try:
-                            resp = requests.post(f"{TELEGRAM_API_URL}/{method}", json=payload).json()
-                            if resp.get('ok'):
-                                threading.Thread(target=delete_message_later, args=(chat_id, resp['result']['message_id'], DELETE_TIMEOUT)).start()
-                        except: pass
-                    else:
-                        requests.post(f"{TELEGRAM_API_URL}/sendMessage", json={'chat_id': chat_id, 'text': "❌ File expired."})
-            else:
-                requests.post(f"{TELEGRAM_API_URL}/sendMessage", json={'chat_id': chat_id, 'text': "👋 Welcome to Anime Nexus!"})
+        handle_bot_message(update['message'])
 
     return jsonify({'status': 'ok'})
 
+# === LONG POLLING (getUpdates) ===
+# webhook-এর বিকল্প: python bot.py poll
+
+def load_poll_offset():
+    while True:
+        try:
+            doc = bot_state.find_one({"_id": "polling_offset"})
+            return doc['offset'] if doc else None
+        except Exception as e:
+            print(f"❌ Offset load error, retrying: {e}")
+            time.sleep(5)
+
+def save_poll_offset(offset):
+    # সেভ না হলেও মেমরির অফসেট দিয়ে চলতে থাকে, পরের ব্যাচে আবার সেভ হবে
+    for _ in range(3):
+        try:
+            bot_state.update_one({"_id": "polling_offset"}, {"$set": {"offset": offset}}, upsert=True)
+            return True
+        except Exception as e:
+            print(f"❌ Offset save error: {e}")
+            time.sleep(2)
+    return False
+
+def run_polling():
+    # getUpdates কাজ করার জন্য webhook মুছে ফেলা জরুরি
+    try: get_http().post(f"{TELEGRAM_API_URL}/deleteWebhook", timeout=TELEGRAM_TIMEOUT)
+    except Exception as e: print(f"❌ deleteWebhook failed: {e}")
+
+    offset = load_poll_offset()
+    retries = 0
+    message_pool = ThreadPoolExecutor(max_workers=POLL_MESSAGE_WORKERS)
+    print(f"✅ Polling started (offset={offset})")
+    while True:
+        params = {'timeout': POLL_TIMEOUT, 'limit': POLL_LIMIT, 'allowed_updates': ['message', 'channel_post']}
+        if offset is not None: params['offset'] = offset
+        try:
+            resp = get_http().post(f"{TELEGRAM_API_URL}/getUpdates", json=params, timeout=POLL_TIMEOUT + 10).json()
+        except Exception as e:
+            print(f"❌ getUpdates error: {e}")
+            time.sleep(5)
+            continue
+
+        if not resp.get('ok'):
+            time.sleep(resp.get('parameters', {}).get('retry_after', 5))
+            continue
+
+        updates = resp.get('result', [])
+        if not updates: continue
+        next_offset = process_updates(updates, message_pool)
+        if next_offset <= updates[-1]['update_id']:
+            # ফেল করা আপডেট থেকে আবার চেষ্টা; বারবার ফেল করলে সেটা বাদ দিয়ে এগোনো
+            retries = retries + 1 if next_offset == offset else 1
+            if retries >= POLL_MAX_RETRIES:
+                print(f"❌ Skipping update {next_offset} after {retries} failed attempts")
+                next_offset += 1
+                retries = 0
+            else:
+                time.sleep(5)
+        else:
+            retries = 0
+        # প্রসেস হওয়া আপডেট পর্যন্তই অফসেট সেভ, যাতে রিস্টার্টে ঠিক এখান থেকে শুরু হয়
+        if next_offset != offset:
+            offset = next_offset
+            save_poll_offset(offset)
+
 # ================================
 #        MODERN UI TEMPLATES (Anime Nexus)
 # ================================
@@ -338,7 +681,7 @@ index_template = """
         <div class="swiper-wrapper">
             {% for slide in slider_movies %}
             <div class="swiper-slide group">
-                <a href="{{ url_for('movie_detail', movie_id=slide._id) }}" class="block w-full h-full relative">
+                <a href="{{ url_for('main.movie_detail', movie_id=slide._id) }}" class="block w-full h-full relative">
                     <img src="{{ slide.backdrop or slide.poster }}" class="w-full h-full object-cover transform group-hover:scale-105 transition duration-700">
                     <div class="absolute inset-0 bg-gradient-to-t from-black via-black/40 to-transparent"></div>
                     <div class="absolute bottom-0 left-0 p-6 md:p-10 w-full">
@@ -365,7 +708,7 @@ index_template = """
 
     <div class="grid grid-cols-2 md:grid-cols-4 lg:grid-cols-5 gap-4 md:gap-6">
         {% for movie in movies %}
-        <a href="{{ url_for('movie_detail', movie_id=movie._id) }}" class="group relative block bg-card rounded-xl overflow-hidden hover:-translate-y-2 transition-all duration-300 border border-white/5">
+        <a href="{{ url_for('main.movie_detail', movie_id=movie._id) }}" class="group relative block bg-card rounded-xl overflow-hidden hover:-translate-y-2 transition-all duration-300 border border-white/5">
             <div class="aspect-[2/3] overflow-hidden relative">
                 <img src="{{ movie.poster or 'https://via.placeholder.com/300x450' }}" alt="{{ movie.title }}" class="w-full h-full object-cover group-hover:scale-110 transition duration-500">
                 <div class="absolute top-2 right-2 bg-black/60 backdrop-blur-md text-yellow-400 text-xs font-bold px-2 py-1 rounded"><i class="fas fa-star"></i> {{ movie.vote_average }}</div>
@@ -437,6 +780,15 @@ detail_template = """
                     <i class="fas fa-cloud-download-alt text-primary"></i> Download / Watch
                 </h3>
                 {% if movie.files %}
+                    {% if batches %}
+                    <div class="flex flex-wrap gap-3 mb-5">
+                        {% for batch in batches %}
+                        <a href="https://t.me/{{ BOT_USERNAME }}?start={{ batch.code }}" target="_blank" class="inline-flex items-center gap-2 bg-primary hover:bg-primary/80 text-white px-5 py-3 rounded-xl font-bold transition">
+                            <i class="fas fa-layer-group"></i> Get whole season {{ batch.season }} <span class="text-xs font-normal opacity-80">{{ batch.quality }}</span>
+                        </a>
+                        {% endfor %}
+                    </div>
+                    {% endif %}
                     <div class="grid gap-3">
                         {% for file in movie.files|reverse %}
                         <a href="https://t.me/{{ BOT_USERNAME }}?start={{ file.unique_code }}" target="_blank" class="flex items-center justify-between bg-zinc-800/50 hover:bg-primary hover:scale-[1.01] border border-white/5 p-4 rounded-xl transition-all duration-300 group">
@@ -641,7 +993,7 @@ admin_edit = """
 #        FLASK ROUTES
 # ================================
 
-@app.route('/')
+@bp.route('/')
 def home():
     page = int(request.args.get('page', 1))
     per_page = 20
@@ -661,29 +1013,226 @@ def home():
 
     return render_template_string(index_template, movies=movie_list, slider_movies=slider_movies, page=page, has_next=(page*per_page < total_movies))
 
-@app.route('/movie/<movie_id>')
+@bp.route('/movie/<movie_id>')
 def movie_detail(movie_id):
     try:
         movie = movies.find_one({"_id": ObjectId(movie_id)})
         if not movie: return "Not Found", 404
-        return render_template_string(detail_template, movie=movie)
+        return render_template_string(detail_template, movie=movie, batches=get_batches(movie))
     except: return "Invalid ID", 400
 
+# === SHORT LINK CACHE ===
+# একই (domain, url) বারবার শর্ট না করে মেমরি (LRU) ও MongoDB-তে ক্যাশ রাখা হয়,
+# একই সময়ে একই লিংকের একাধিক রিকোয়েস্ট একটাই আপস্ট্রিম কল শেয়ার করে,
+# আর বারবার ফেল করা শর্টনার ডোমেইন কিছু সময়ের জন্য বন্ধ রাখা হয়।
+
+class ShortenerError(Exception):
+    pass
+
+class ShortenerUnavailable(ShortenerError):
+    pass
+
+_short_cache = OrderedDict()
+_short_lock = threading.Lock()
+_short_inflight = {}
+_short_breakers = OrderedDict()
+_short_index_pid = None
+_short_db_down_until = 0
+_short_db_writes = 0
+
+def _short_key(domain, api_key, url):
+    api_hash = hashlib.sha1(api_key.encode()).hexdigest()[:12]
+    return hashlib.sha1(f"{domain.lower()}|{api_hash}|{url}".encode()).hexdigest()
+
+def _short_cache_get(key):
+    with _short_lock:
+        entry = _short_cache.get(key)
+        if entry and entry[0] > time.time():
+            _short_cache.move_to_end(key)
+            return entry[1]
+        _short_cache.pop(key, None)
+    return None
+
+def _short_cache_put(key, result, created_at=None):
+    # Mongo থেকে আসা এন্ট্রির মেয়াদ তার created_at থেকে গোনা হয়, নতুন করে পুরো TTL নয়
+    age = (datetime.utcnow() - created_at).total_seconds() if created_at else 0
+    if age >= SHORTENER_CACHE_TTL: return
+    with _short_lock:
+        _short_cache[key] = (time.time() + SHORTENER_CACHE_TTL - age, result)
+        _short_cache.move_to_end(key)
+        while len(_short_cache) > SHORTENER_CACHE_SIZE:
+            _short_cache.popitem(last=False)
+
+def _trim_short_links():
+    # TTL ছাড়াও সর্বোচ্চ SHORTENER_DB_MAX_DOCS টি এন্ট্রি রাখা হয়, পুরনোগুলো আগে মুছে যায়
+    try:
+        with pymongo.timeout(SHORTENER_DB_TRIM_TIMEOUT):
+            if short_links.estimated_document_count() <= SHORTENER_DB_MAX_DOCS: return
+            cutoff = next(short_links.find({}, {"created_at": 1}).sort("created_at", -1).skip(SHORTENER_DB_MAX_DOCS).limit(1), None)
+            if cutoff: short_links.delete_many({"created_at": {"$lte": cutoff['created_at']}})
+    except Exception as e:
+        print(f"❌ short_links trim error: {e}")
+
+def _short_db_written():
+    # প্রতি SHORTENER_DB_TRIM_EVERY টি নতুন এন্ট্রির পর ব্যাকগ্রাউন্ডে সাইজ চেক
+    global _short_db_writes
+    with _short_lock:
+        _short_db_writes += 1
+        due = _short_db_writes % SHORTENER_DB_TRIM_EVERY == 0
+    if due: threading.Thread(target=_trim_short_links, daemon=True).start()
+
+def _short_db(op):
+    # Mongo ধীর বা ডাউন থাকলে শর্টনার আটকে না রেখে ক্যাশ লেয়ার কিছুক্ষণ বাদ দেওয়া হয়
+    global _short_db_down_until
+    if _short_db_down_until > time.time(): return None
+    try:
+        with pymongo.timeout(SHORTENER_DB_TIMEOUT):
+            return op()
+    except Exception as e:
+        _short_db_down_until = time.time() + SHORTENER_COOLDOWN
+        print(f"❌ short_links unavailable, skipping for {SHORTENER_COOLDOWN}s: {e}")
+        return None
+
+def _ensure_short_index():
+    # প্রতি প্রসেসে একবারই চেষ্টা; TTL বদলালে collMod দিয়ে বিদ্যমান ইনডেক্স আপডেট
+    global _short_index_pid
+    if _short_index_pid == os.getpid() or _short_db_down_until > time.time(): return
+    _short_index_pid = os.getpid()
+    try:
+        with pymongo.timeout(SHORTENER_DB_TIMEOUT):
+            try:
+                short_links.create_index("created_at", expireAfterSeconds=SHORTENER_CACHE_TTL)
+            except pymongo.errors.OperationFailure as e:
+                if e.code != 85: raise  # IndexOptionsConflict
+                get_db().command("collMod", "short_links", index={"keyPattern": {"created_at": 1}, "expireAfterSeconds": SHORTENER_CACHE_TTL})
+    except Exception as e:
+        print(f"❌ short_links TTL index error: {e}")
+
+def _breaker_allows(domain):
+    # cooldown শেষ হলে half-open: শুধু একটি probe রিকোয়েস্ট যেতে দেওয়া হয়
+    with _short_lock:
+        state = _short_breakers.get(domain)
+        if not state or not state['open_until']: return True
+        if state['open_until'] > time.time() or state['probing']: return False
+        state['probing'] = True
+        return True
+
+def _breaker_record(domain, ok):
+    with _short_lock:
+        if ok:
+            # সুস্থ ডোমেইনের স্টেট রাখার দরকার নেই
+            _short_breakers.pop(domain, None)
+            return
+        state = _short_breakers.setdefault(domain, {'failures': 0, 'open_until': 0, 'probing': False})
+        _short_breakers.move_to_end(domain)
+        while len(_short_breakers) > SHORTENER_BREAKER_SIZE:
+            _short_breakers.popitem(last=False)
+        state['failures'] += 1
+        # probe ফেল করলে সাথে সাথে আবার open
+        if state['probing'] or state['failures'] >= SHORTENER_FAIL_THRESHOLD:
+            state['open_until'] = time.time() + SHORTENER_COOLDOWN
+            state['failures'] = 0
+            state['probing'] = False
+
+def _call_shortener(domain, api_key, url):
+    if not _breaker_allows(domain):
+        raise ShortenerUnavailable(f"{domain} is temporarily unavailable")
+    api_url = f"https://{domain}/api?api={api_key}&url={urllib.parse.quote(url)}"
+    try:
+        resp = get_http().get(api_url, timeout=SHORTENER_TIMEOUT)
+        if resp.status_code >= 500:
+            raise ShortenerUnavailable(f"{domain} returned HTTP {resp.status_code}")
+        result = resp.json() if resp.ok else None
+    except Exception:
+        _breaker_record(domain, False)
+        raise
+    # 4xx মানে শর্টনার চালু আছে কিন্তু রিকোয়েস্ট বাতিল (ভুল API key, rate limit), এটা ক্যাশ হয় না
+    _breaker_record(domain, True)
+    if result is None:
+        raise ShortenerError(f"{domain} returned HTTP {resp.status_code}")
+    return result
+
+def _is_short_success(result):
+    # শুধু আসল শর্ট লিংক থাকলেই ক্যাশ ও Mongo-তে সেভ হয়
+    if not isinstance(result, dict) or result.get('error'): return False
+    short = result.get('shortenedUrl')
+    return result.get('status') == 'success' or (isinstance(short, str) and bool(short.strip()))
+
+def shorten_url(domain, api_key, url):
+    key = _short_key(domain, api_key, url)
+    cached = _short_cache_get(key)
+    if cached is not None: return cached
+
+    with _short_lock:
+        flight = _short_inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = {'event': threading.Event(), 'result': None, 'error': None}
+            _short_inflight[key] = flight
+
+    if not leader:
+        flight['event'].wait(SHORTENER_LEADER_MAX_WAIT)
+        if flight['error']: raise flight['error']
+        if flight['result'] is None: raise ShortenerUnavailable("Shortener timed out")
+        return flight['result']
+
+    try:
+        doc = _short_db(lambda: short_links.find_one({"_id": key}))
+        if doc and _is_short_success(doc.get('result')):
+            result = doc['result']
+            _short_cache_put(key, result, doc.get('created_at'))
+        else:
+            result = _call_shortener(domain, api_key, url)
+            if _is_short_success(result):
+                _ensure_short_index()
+                if _short_db(lambda: short_links.replace_one({"_id": key}, {"_id": key, "domain": domain, "url": url, "result": result, "created_at": datetime.utcnow()}, upsert=True)):
+                    _short_db_written()
+                _short_cache_put(key, result)
+        flight['result'] = result
+        return result
+    except Exception as e:
+        flight['error'] = e
+        raise
+    finally:
+        with _short_lock:
+            _short_inflight.pop(key, None)
+        flight['event'].set()
+
 # API Proxy
-@app.route('/api/shorten')
+@bp.route('/api/shorten')
 def shorten_link_proxy():
     original_url = request.args.get('url')
     api_key = request.args.get('api')
     domain = request.args.get('domain')
     if not original_url or not api_key or not domain: return jsonify({'error': 'Missing Params'})
     try:
-        api_url = f"https://{domain}/api?api={api_key}&url={urllib.parse.quote(original_url)}"
-        return jsonify(requests.get(api_url).json())
+        return jsonify(shorten_url(domain, api_key, original_url))
     except Exception as e: return jsonify({'error': str(e)})
 
+# এক পেজের সব লিংক একবারে শর্ট করার জন্য
+@bp.route('/api/shorten/batch', methods=['POST'])
+def shorten_link_batch():
+    data = request.get_json(silent=True) or {}
+    api_key = data.get('api')
+    domain = data.get('domain')
+    urls = data.get('urls')
+    if not isinstance(urls, list) or not isinstance(api_key, str) or not isinstance(domain, str):
+        return jsonify({'error': 'Invalid Params'})
+    urls = list(dict.fromkeys(u for u in urls if isinstance(u, str) and u))
+    if not urls or not api_key or not domain: return jsonify({'error': 'Missing Params'})
+    if len(urls) > SHORTENER_BATCH_LIMIT: return jsonify({'error': f'Max {SHORTENER_BATCH_LIMIT} urls per batch'})
+
+    def _one(url):
+        try: return url, shorten_url(domain, api_key, url)
+        except Exception as e: return url, {'error': str(e)}
+
+    with ThreadPoolExecutor(max_workers=min(8, len(urls))) as pool:
+        results = dict(pool.map(_one, urls))
+    return jsonify({'results': results})
+
 # --- ADMIN ROUTES ---
 
-@app.route('/admin')
+@bp.route('/admin')
 def admin_home():
     if not check_auth(): return Response('Login Required', 401, {'WWW-Authenticate': 'Basic realm="Login Required"'})
     page = int(request.args.get('page', 1))
@@ -693,7 +1242,7 @@ def admin_home():
     full_html = admin_base.replace('<!-- CONTENT_GOES_HERE -->', admin_dashboard)
     return render_template_string(full_html, movies=movie_list, page=page, q=q, active='dashboard')
 
-@app.route('/admin/movie/edit/<movie_id>', methods=['GET', 'POST'])
+@bp.route('/admin/movie/edit/<movie_id>', methods=['GET', 'POST'])
 def admin_edit_movie(movie_id):
     if not check_auth(): return Response('Login Required', 401)
     movie = movies.find_one({"_id": ObjectId(movie_id)})
@@ -711,18 +1260,18 @@ def admin_edit_movie(movie_id):
             "updated_at": datetime.utcnow()
         }
         movies.update_one({"_id": ObjectId(movie_id)}, {"$set": update_data})
-        return redirect(url_for('admin_home'))
+        return redirect(url_for('main.admin_home'))
         
     full_html = admin_base.replace('<!-- CONTENT_GOES_HERE -->', admin_edit)
     return render_template_string(full_html, movie=movie, active='dashboard')
 
-@app.route('/admin/movie/delete/<movie_id>')
+@bp.route('/admin/movie/delete/<movie_id>')
 def admin_delete_movie(movie_id):
     if not check_auth(): return Response('Login Required', 401)
     movies.delete_one({"_id": ObjectId(movie_id)})
-    return redirect(url_for('admin_home'))
+    return redirect(url_for('main.admin_home'))
 
-@app.route('/admin/api/tmdb')
+@bp.route('/admin/api/tmdb')
 def api_tmdb_search():
     if not check_auth(): return jsonify({'error': 'Unauthorized'}), 401
     query = request.args.get('q', '').strip()
@@ -731,15 +1280,44 @@ def api_tmdb_search():
     # Check if TMDB ID
     if query.isdigit():
         url = f"https://api.themoviedb.org/3/movie/{query}?api_key={TMDB_API_KEY}"
-        resp = requests.get(url)
+        resp = get_http().get(url)
         if resp.status_code == 200: return jsonify({'results': [resp.json()]})
         
     # Search
     url = f"https://api.themoviedb.org/3/search/multi?api_key={TMDB_API_KEY}&query={requests.utils.quote(query)}"
-    return jsonify(requests.get(url).json())
+    return jsonify(get_http().get(url).json())
+
+# --- HEALTH CHECKS ---
+
+@bp.route('/healthz')
+def healthz():
+    # Liveness: শুধু প্রসেস চালু আছে কিনা, কোনো বাইরের সার্ভিসে যায় না
+    return jsonify({'status': 'ok'})
+
+@bp.route('/readyz')
+def readyz():
+    # Readiness: MongoDB রিচেবল হলে তবেই ট্রাফিক নেওয়ার জন্য প্রস্তুত
+    try:
+        get_db().client.admin.command('ping')
+        return jsonify({'status': 'ready'})
+    except Exception as e:
+        return jsonify({'status': 'unavailable', 'error': str(e)}), 503
+
+# === APPLICATION FACTORY ===
+# gunicorn: gunicorn "bot:create_app()" অথবা পুরনো "bot:app"
+def create_app():
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY or os.urandom(24)
+    app.register_blueprint(bp)
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
-    if WEBSITE_URL and BOT_TOKEN:
-        try: requests.get(f"https://api.telegram.org/bot{BOT_TOKEN}/setWebhook?url={WEBSITE_URL.rstrip('/')}/webhook/{BOT_TOKEN}")
-        except: pass
-    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5000)), debug=True)
+    if len(sys.argv) > 1 and sys.argv[1] == 'poll':
+        run_polling()
+    else:
+        if WEBSITE_URL and BOT_TOKEN:
+            try: get_http().get(f"{TELEGRAM_API_URL}/setWebhook?url={WEBSITE_URL.rstrip('/')}/webhook/{BOT_TOKEN}", timeout=TELEGRAM_TIMEOUT)
+            except: pass
+        app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5000)), debug=True)